@@ -0,0 +1,70 @@
+"""Benchmark sharded scatter-gather retrieval against the single-process baseline.
+
+Usage:
+    uv run python benchmarks/bench_sharded_retriever.py --docs 200000 --queries 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+
+from langchain_core.documents import Document
+
+from multi_agent_system.retrievers import SimpleKeywordRetriever
+from multi_agent_system.sharded_retriever import ShardedKeywordRetriever
+
+VOCAB = (
+    "kubernetes deploy rollback secretos pipeline api latencia observabilidad canary helm "
+    "vacaciones onboarding beneficios desempeno licencia politica feedback cursos bienestar"
+).split()
+
+
+def synthetic_docs(n_docs: int, words_per_doc: int, seed: int = 7) -> list[Document]:
+    rng = random.Random(seed)
+    return [
+        Document(
+            page_content=" ".join(rng.choice(VOCAB) for _ in range(words_per_doc)),
+            metadata={"source": "synthetic.md", "chunk_id": idx},
+        )
+        for idx in range(n_docs)
+    ]
+
+
+def time_queries(retriever, queries: list[str]) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        retriever.invoke(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sharded retriever speedup vs core count")
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--words", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--max-shards", type=int, default=os.cpu_count() or 1)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    docs = synthetic_docs(args.docs, args.words)
+    rng = random.Random(11)
+    queries = [" ".join(rng.sample(VOCAB, 3)) for _ in range(args.queries)]
+
+    baseline_ms = time_queries(SimpleKeywordRetriever(docs=docs, k=4), queries)
+    print(f"cores={os.cpu_count()} docs={args.docs} queries={args.queries}")
+    print(f"baseline        {baseline_ms:9.1f} ms/query")
+
+    shard_counts = sorted({1, 2, 4, 8, 16, args.max_shards} & set(range(1, args.max_shards + 1)))
+    for shards in shard_counts:
+        with ShardedKeywordRetriever(docs=docs, k=4, shards=shards).start() as retriever:
+            sharded_ms = time_queries(retriever, queries)
+        print(f"shards={shards:<3}      {sharded_ms:9.1f} ms/query  speedup={baseline_ms / sharded_ms:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
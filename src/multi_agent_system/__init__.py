@@ -1,5 +1,13 @@
 """Multi-agent routing + RAG skeleton using LangChain."""
 
+from .admission import AdmissionController, Priority, build_admission_controller
 from .pipeline import MultiAgentService, build_multi_agent_pipeline, build_multi_agent_service
 
-__all__ = ["MultiAgentService", "build_multi_agent_pipeline", "build_multi_agent_service"]
+__all__ = [
+    "AdmissionController",
+    "MultiAgentService",
+    "Priority",
+    "build_admission_controller",
+    "build_multi_agent_pipeline",
+    "build_multi_agent_service",
+]
@@ -0,0 +1,333 @@
+"""Admission control and load shedding in front of `MultiAgentService`.
+
+Requests are admitted while the number of in-flight requests is below an
+adaptive concurrency limit (AIMD on the observed latency); only requests
+that cannot start right away wait in a bounded priority queue. Requests of
+the same conversation are admitted one at a time, in arrival order. When
+the queue is full or a request waits longer than `max_wait_s`, it is shed
+immediately with a `fallback_unknown` envelope routed by the keyword
+heuristic, so no LLM call is spent on it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Callable
+
+from .config import Settings
+from .intent_classifier import heuristic_intent_router
+from .pipeline import MultiAgentService
+from .prompts import SHED_FALLBACK_TEXT
+from .schemas import RoutedResponse
+
+
+class Priority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+class RequestShed(Exception):
+    """Raised internally when a request is rejected by admission control."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+@dataclass
+class AdaptiveConcurrencyLimit:
+    """AIMD concurrency limit driven by request latency.
+
+    Each fast request raises the limit by 1/limit (about +1 per full window);
+    a request slower than `target_latency_s` multiplies it by `backoff`.
+    """
+
+    limit: float = 8.0
+    min_limit: int = 1
+    max_limit: int = 64
+    target_latency_s: float = 8.0
+    backoff: float = 0.7
+
+    @property
+    def current(self) -> int:
+        return max(self.min_limit, min(self.max_limit, int(self.limit)))
+
+    def observe(self, latency_s: float, ok: bool = True) -> None:
+        if ok and latency_s <= self.target_latency_s:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / max(self.limit, 1.0))
+        else:
+            self.limit = max(float(self.min_limit), self.limit * self.backoff)
+
+
+@dataclass
+class AdmissionStats:
+    admitted: int = 0
+    shed: dict[str, int] = field(default_factory=dict)
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    in_flight: int = 0
+    total_wait_s: float = 0.0
+    max_wait_s: float = 0.0
+
+    def snapshot(self, concurrency_limit: int) -> dict:
+        return {
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "shed_total": sum(self.shed.values()),
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "concurrency_limit": concurrency_limit,
+            "mean_wait_ms": self.total_wait_s / self.admitted * 1000 if self.admitted else 0.0,
+            "max_wait_ms": self.max_wait_s * 1000,
+        }
+
+
+@dataclass(eq=False)
+class _Ticket:
+    priority: int
+    seq: int
+    conversation_id: str
+    enqueued_at: float
+    wake: Callable[[], None] | None = None
+    admitted: bool = False
+    shed_reason: str | None = None
+
+    def sort_key(self) -> tuple[int, int]:
+        return self.priority, self.seq
+
+
+@dataclass
+class AdmissionController:
+    """Bounded, priority-aware admission layer around `MultiAgentService`."""
+
+    service: MultiAgentService
+    max_queue_size: int = 64
+    max_wait_s: float = 5.0
+    limiter: AdaptiveConcurrencyLimit = field(default_factory=AdaptiveConcurrencyLimit)
+    stats: AdmissionStats = field(default_factory=AdmissionStats)
+    _waiting: list[_Ticket] = field(default_factory=list)
+    _busy_conversations: set[str] = field(default_factory=set)
+    _seq: itertools.count = field(default_factory=itertools.count)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _cond: threading.Condition = field(init=False)
+
+    def __post_init__(self) -> None:
+        self._cond = threading.Condition(self._lock)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return self.stats.snapshot(self.limiter.current)
+
+    # -- queue state (callers hold self._lock) ------------------------------
+
+    def _shed_count(self, reason: str) -> None:
+        self.stats.shed[reason] = self.stats.shed.get(reason, 0) + 1
+
+    def _remove_waiting(self, ticket: _Ticket) -> None:
+        self._waiting = [waiting for waiting in self._waiting if waiting is not ticket]
+        self.stats.queue_depth = len(self._waiting)
+
+    def _can_admit_directly(self, ticket: _Ticket) -> bool:
+        """Free slot, idle conversation and no waiter that could take the slot."""
+        return (
+            self.stats.in_flight < self.limiter.current
+            and ticket.conversation_id not in self._busy_conversations
+            and all(waiting.conversation_id != ticket.conversation_id for waiting in self._waiting)
+            and self._next_eligible() is None
+        )
+
+    def _enqueue(self, conversation_id: str, priority: Priority) -> _Ticket:
+        """Admit immediately when possible; otherwise queue (bounded) the ticket."""
+        ticket = _Ticket(int(priority), next(self._seq), conversation_id, time.monotonic())
+        if self._can_admit_directly(ticket):
+            self._admit(ticket)
+            return ticket
+        if len(self._waiting) >= self.max_queue_size:
+            worst = max(self._waiting, key=_Ticket.sort_key, default=None)
+            if worst is None or worst.priority <= ticket.priority:
+                self._shed_count("queue_full")
+                raise RequestShed("queue_full")
+            # Preempt the lowest-priority, most recent waiter.
+            self._remove_waiting(worst)
+            worst.shed_reason = "preempted"
+            self._shed_count("preempted")
+            self._cond.notify_all()
+            if worst.wake is not None:
+                worst.wake()
+        self._waiting.append(ticket)
+        self.stats.queue_depth = len(self._waiting)
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.stats.queue_depth)
+        return ticket
+
+    def _next_eligible(self) -> _Ticket | None:
+        earliest_seq: dict[str, int] = {}
+        for ticket in self._waiting:
+            seq = earliest_seq.get(ticket.conversation_id)
+            if seq is None or ticket.seq < seq:
+                earliest_seq[ticket.conversation_id] = ticket.seq
+        for ticket in sorted(self._waiting, key=_Ticket.sort_key):
+            if ticket.conversation_id in self._busy_conversations:
+                continue
+            if earliest_seq[ticket.conversation_id] == ticket.seq:
+                return ticket
+        return None
+
+    def _try_admit(self, ticket: _Ticket) -> bool:
+        if ticket.admitted:
+            return True
+        if self.stats.in_flight >= self.limiter.current:
+            return False
+        if self._next_eligible() is not ticket:
+            return False
+        self._remove_waiting(ticket)
+        self._admit(ticket)
+        # Another waiter may now be the next eligible one.
+        self._wake_all()
+        return True
+
+    def _admit(self, ticket: _Ticket) -> None:
+        ticket.admitted = True
+        wait_s = time.monotonic() - ticket.enqueued_at
+        self.stats.admitted += 1
+        self.stats.in_flight += 1
+        self.stats.total_wait_s += wait_s
+        self.stats.max_wait_s = max(self.stats.max_wait_s, wait_s)
+        self._busy_conversations.add(ticket.conversation_id)
+
+    def _check_waiting(self, ticket: _Ticket) -> bool:
+        """Admit if possible; raise RequestShed when preempted or timed out."""
+        if ticket.shed_reason is not None:
+            raise RequestShed(ticket.shed_reason)
+        if self._try_admit(ticket):
+            return True
+        if time.monotonic() - ticket.enqueued_at >= self.max_wait_s:
+            self._remove_waiting(ticket)
+            self._shed_count("timeout")
+            self._wake_all()
+            raise RequestShed("timeout")
+        return False
+
+    def _release(self, ticket: _Ticket, latency_s: float, ok: bool) -> None:
+        with self._lock:
+            self.stats.in_flight -= 1
+            self._busy_conversations.discard(ticket.conversation_id)
+            self.limiter.observe(latency_s, ok)
+            self._wake_all()
+
+    def _wake_all(self) -> None:
+        self._cond.notify_all()
+        for waiting in self._waiting:
+            if waiting.wake is not None:
+                waiting.wake()
+
+    # -- request paths -------------------------------------------------------
+
+    def _remaining_wait(self, ticket: _Ticket) -> float:
+        return max(0.0, self.max_wait_s - (time.monotonic() - ticket.enqueued_at))
+
+    def _admit_sync(self, conversation_id: str, priority: Priority) -> _Ticket:
+        with self._cond:
+            ticket = self._enqueue(conversation_id, priority)
+            while not self._check_waiting(ticket):
+                self._cond.wait(timeout=self._remaining_wait(ticket))
+            return ticket
+
+    async def _admit_async(self, conversation_id: str, priority: Priority) -> _Ticket:
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        with self._lock:
+            ticket = self._enqueue(conversation_id, priority)
+            ticket.wake = lambda: loop.call_soon_threadsafe(event.set)
+        try:
+            while True:
+                with self._lock:
+                    if self._check_waiting(ticket):
+                        return ticket
+                    event.clear()
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=self._remaining_wait(ticket))
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            with self._lock:
+                self._remove_waiting(ticket)
+                self._wake_all()
+            raise
+
+    def shed_response(self, query: str, conversation_id: str, reason: str) -> RoutedResponse:
+        """Cheap envelope for shed requests: heuristic intent, no retrieval or LLM."""
+        intent = heuristic_intent_router(query)
+        return RoutedResponse(
+            intent=intent.intent,
+            confidence=intent.confidence,
+            rationale=intent.rationale,
+            answer=SHED_FALLBACK_TEXT,
+            citations=[],
+            follow_up_question="Puedes reintentar en unos segundos?",
+            route_used="fallback_unknown",
+            conversation_id=conversation_id,
+            processing_ms=0,
+            retrieval_hits=0,
+            debug={"shed": reason, "router": "heuristic", "admission": self.metrics()},
+        )
+
+    def ask(
+        self,
+        query: str,
+        *,
+        conversation_id: str = "default",
+        priority: Priority = Priority.NORMAL,
+    ) -> RoutedResponse:
+        try:
+            ticket = self._admit_sync(conversation_id, priority)
+        except RequestShed as shed:
+            return self.shed_response(query, conversation_id, shed.reason)
+        start, ok = time.monotonic(), False
+        try:
+            result = self.service.ask(query, conversation_id=conversation_id)
+            ok = True
+            return result
+        finally:
+            self._release(ticket, time.monotonic() - start, ok)
+
+    async def aask(
+        self,
+        query: str,
+        *,
+        conversation_id: str = "default",
+        priority: Priority = Priority.NORMAL,
+    ) -> RoutedResponse:
+        try:
+            ticket = await self._admit_async(conversation_id, priority)
+        except RequestShed as shed:
+            return self.shed_response(query, conversation_id, shed.reason)
+        start, ok = time.monotonic(), False
+        try:
+            result = await self.service.aask(query, conversation_id=conversation_id)
+            ok = True
+            return result
+        finally:
+            self._release(ticket, time.monotonic() - start, ok)
+
+
+
+def build_admission_controller(settings: Settings, service: MultiAgentService) -> AdmissionController:
+    """Wrap `service` with admission control configured from settings."""
+    limiter = AdaptiveConcurrencyLimit(
+        limit=float(settings.admission_max_concurrency),
+        max_limit=settings.admission_max_concurrency,
+        target_latency_s=settings.admission_target_latency_s,
+    )
+    return AdmissionController(
+        service=service,
+        max_queue_size=settings.admission_max_queue,
+        max_wait_s=settings.admission_max_wait_s,
+        limiter=limiter,
+    )
@@ -0,0 +1,107 @@
+"""Single-flight coalescing of identical in-flight requests.
+
+Concurrent callers asking the same normalized query with the same history
+share one pipeline execution. Each caller still receives its own response
+object, so per-caller fields (e.g. conversation_id) can be patched safely.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from .text import normalize_query
+
+T = TypeVar("T")
+
+
+def coalescing_key(query: str, history: list[str], digest: str = "") -> tuple[str, tuple[str, ...], str]:
+    """Requests are compatible when query, history and digest normalize identically."""
+    return normalize_query(query), tuple(normalize_query(line) for line in history), digest
+
+
+@dataclass
+class CoalescingStats:
+    executions: int = 0
+    coalesced: int = 0
+
+    def snapshot(self) -> dict[str, int]:
+        return {"executions": self.executions, "coalesced": self.coalesced}
+
+
+@dataclass
+class RequestCoalescer:
+    """Share one in-flight execution between concurrent identical requests.
+
+    Sync and async callers share the same in-flight table: the leader owns a
+    `concurrent.futures.Future`; sync followers block on it and async
+    followers await it through `asyncio.wrap_future`. Async work runs in a
+    task no single caller owns, so cancelling one caller (e.g. a client
+    timeout) does not cancel the others.
+    """
+
+    stats: CoalescingStats = field(default_factory=CoalescingStats)
+    _inflight: dict[Hashable, Future] = field(default_factory=dict)
+    _tasks: set[asyncio.Task] = field(default_factory=set)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats.coalesced += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            self.stats.executions += 1
+            return future, True
+
+    def _release(self, key: Hashable) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def run(self, key: Hashable, fn: Callable[[], T]) -> tuple[T, bool]:
+        """Execute `fn` once per in-flight key.
+
+        Returns the result and whether it was shared from another caller.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._release(key)
+
+    def _settle(self, key: Hashable, future: Future, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._release(key)
+        if task.cancelled():
+            future.set_exception(asyncio.CancelledError())
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    async def arun(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Async counterpart of `run`.
+
+        Each caller awaits the shared execution through `asyncio.shield`;
+        a cancelled caller stops waiting but the work keeps running.
+        """
+        future, leader = self._join(key)
+        if leader:
+            task = asyncio.ensure_future(fn())
+            self._tasks.add(task)
+            task.add_done_callback(lambda done: self._settle(key, future, done))
+        result = await asyncio.shield(asyncio.wrap_future(future))
+        return result, not leader
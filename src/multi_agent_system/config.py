@@ -16,6 +16,16 @@ class Settings:
     project_root: Path
     intent_min_confidence: float
     max_history_turns: int
+    max_turn_tokens: int = 48
+    retriever_shards: int = 1
+    fused_mode: bool = False
+    fused_min_confidence: float = 0.80
+    admission_max_queue: int = 64
+    admission_max_concurrency: int = 16
+    admission_target_latency_s: float = 8.0
+    admission_max_wait_s: float = 5.0
+    token_usage_export_path: Path | None = None
+    token_usage_export_interval_s: float = 60.0
 
 
 
@@ -35,6 +45,16 @@ def load_settings(project_root: Path | None = None) -> Settings:
     model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     raw_threshold = os.getenv("INTENT_MIN_CONFIDENCE", "0.60")
     raw_history = os.getenv("MAX_HISTORY_TURNS", "4")
+    raw_turn_tokens = os.getenv("MAX_TURN_TOKENS", "48")
+    raw_shards = os.getenv("RETRIEVER_SHARDS", "1")
+    fused_mode = os.getenv("FUSED_MODE", "false").strip().lower() in {"1", "true", "yes"}
+    raw_fused_threshold = os.getenv("FUSED_MIN_CONFIDENCE", "0.80")
+    raw_admission = {
+        "ADMISSION_MAX_QUEUE": os.getenv("ADMISSION_MAX_QUEUE", "64"),
+        "ADMISSION_MAX_CONCURRENCY": os.getenv("ADMISSION_MAX_CONCURRENCY", "16"),
+        "ADMISSION_TARGET_LATENCY_S": os.getenv("ADMISSION_TARGET_LATENCY_S", "8.0"),
+        "ADMISSION_MAX_WAIT_S": os.getenv("ADMISSION_MAX_WAIT_S", "5.0"),
+    }
     try:
         threshold = float(raw_threshold)
     except ValueError as exc:
@@ -43,11 +63,57 @@ def load_settings(project_root: Path | None = None) -> Settings:
         max_history = int(raw_history)
     except ValueError as exc:
         raise RuntimeError("MAX_HISTORY_TURNS must be an int, e.g. 4") from exc
+    try:
+        max_turn_tokens = int(raw_turn_tokens)
+    except ValueError as exc:
+        raise RuntimeError("MAX_TURN_TOKENS must be an int, e.g. 48") from exc
+    try:
+        retriever_shards = int(raw_shards)
+    except ValueError as exc:
+        raise RuntimeError("RETRIEVER_SHARDS must be an int, e.g. 4") from exc
+    try:
+        fused_threshold = float(raw_fused_threshold)
+    except ValueError as exc:
+        raise RuntimeError("FUSED_MIN_CONFIDENCE must be a float, e.g. 0.80") from exc
+    try:
+        admission_max_queue = int(raw_admission["ADMISSION_MAX_QUEUE"])
+        admission_max_concurrency = int(raw_admission["ADMISSION_MAX_CONCURRENCY"])
+        admission_target_latency = float(raw_admission["ADMISSION_TARGET_LATENCY_S"])
+        admission_max_wait = float(raw_admission["ADMISSION_MAX_WAIT_S"])
+    except ValueError as exc:
+        raise RuntimeError(
+            "ADMISSION_MAX_QUEUE/ADMISSION_MAX_CONCURRENCY must be ints and "
+            "ADMISSION_TARGET_LATENCY_S/ADMISSION_MAX_WAIT_S floats"
+        ) from exc
 
     if not 0.0 <= threshold <= 1.0:
         raise RuntimeError("INTENT_MIN_CONFIDENCE must be between 0 and 1")
     if max_history < 0:
         raise RuntimeError("MAX_HISTORY_TURNS must be >= 0")
+    if max_turn_tokens < 1:
+        raise RuntimeError("MAX_TURN_TOKENS must be >= 1")
+    if retriever_shards < 1:
+        raise RuntimeError("RETRIEVER_SHARDS must be >= 1")
+    if not 0.0 <= fused_threshold <= 1.0:
+        raise RuntimeError("FUSED_MIN_CONFIDENCE must be between 0 and 1")
+    if admission_max_queue < 0 or admission_max_concurrency < 1:
+        raise RuntimeError("ADMISSION_MAX_QUEUE must be >= 0 and ADMISSION_MAX_CONCURRENCY >= 1")
+    if admission_target_latency <= 0 or admission_max_wait < 0:
+        raise RuntimeError("ADMISSION_TARGET_LATENCY_S must be > 0 and ADMISSION_MAX_WAIT_S >= 0")
+
+    raw_export_path = os.getenv("TOKEN_USAGE_EXPORT_PATH", "")
+    raw_export_interval = os.getenv("TOKEN_USAGE_EXPORT_INTERVAL_S", "60")
+    try:
+        export_interval = float(raw_export_interval)
+    except ValueError as exc:
+        raise RuntimeError("TOKEN_USAGE_EXPORT_INTERVAL_S must be a float, e.g. 60") from exc
+    if export_interval < 0:
+        raise RuntimeError("TOKEN_USAGE_EXPORT_INTERVAL_S must be >= 0")
+    export_path = None
+    if raw_export_path:
+        export_path = Path(raw_export_path)
+        if not export_path.is_absolute():
+            export_path = root / export_path
 
     return Settings(
         openai_api_key=api_key,
@@ -55,4 +121,14 @@ def load_settings(project_root: Path | None = None) -> Settings:
         project_root=root,
         intent_min_confidence=threshold,
         max_history_turns=max_history,
+        max_turn_tokens=max_turn_tokens,
+        retriever_shards=retriever_shards,
+        fused_mode=fused_mode,
+        fused_min_confidence=fused_threshold,
+        admission_max_queue=admission_max_queue,
+        admission_max_concurrency=admission_max_concurrency,
+        admission_target_latency_s=admission_target_latency,
+        admission_max_wait_s=admission_max_wait,
+        token_usage_export_path=export_path,
+        token_usage_export_interval_s=export_interval,
     )
@@ -0,0 +1,364 @@
+"""Offline routing evaluation: accuracy versus latency and token cost.
+
+Replays a labeled query dataset through any classifier runnable (heuristic,
+LLM, or `RecordedClassifier` for fully offline runs), sweeps the confidence
+threshold the orchestrator applies, and reports the Pareto front of
+accuracy against latency and estimated tokens.
+
+Cost per operating point = classifier cost + downstream RAG agent cost for
+requests that clear the threshold (the rest go to `fallback_unknown` and
+skip the agent call). With the default agent cost of 0, latency and tokens
+only vary between classifiers, not between thresholds.
+
+Dataset format (JSONL): {"query": "...", "label": "HR", "history": [...]}
+Recordings format (JSONL): {"query": "...", "intent": "TECH", "confidence": 0.8,
+"rationale": "...", "latency_ms": 420.0, "prompt_tokens": 310, "completion_tokens": 25}
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from .intent_classifier import heuristic_intent_router
+from .prompts import ORCHESTRATOR_INTENT_PROMPT
+from .schemas import IntentClassification, IntentLabel
+from .text import normalize_query
+
+DEFAULT_THRESHOLDS = (0.0, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+
+
+@dataclass
+class LabeledQuery:
+    query: str
+    label: IntentLabel
+    history: list[str] = field(default_factory=list)
+
+
+@dataclass
+class QueryTrace:
+    """Raw classifier output and cost for one dataset entry."""
+
+    query: str
+    label: IntentLabel
+    predicted: IntentLabel
+    confidence: float
+    latency_ms: float
+    estimated_tokens: int
+
+
+@dataclass
+class LabelMetrics:
+    precision: float
+    recall: float
+    support: int
+
+
+@dataclass
+class OperatingPoint:
+    classifier: str
+    threshold: float
+    accuracy: float
+    per_label: dict[str, LabelMetrics]
+    confusion: dict[str, dict[str, int]]
+    mean_latency_ms: float
+    p95_latency_ms: float
+    mean_tokens: float
+    routed_share: float
+    pareto: bool = False
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def estimate_llm_classifier_tokens(item: LabeledQuery) -> int:
+    """Estimate prompt + completion tokens of one LLM classification call."""
+    prompt = "\n".join([ORCHESTRATOR_INTENT_PROMPT, *item.history, item.query])
+    return estimate_tokens(prompt) + 30
+
+
+def load_labeled_dataset(path: Path) -> list[LabeledQuery]:
+    items = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        items.append(
+            LabeledQuery(query=row["query"], label=IntentLabel(row["label"]), history=row.get("history", []))
+        )
+    return items
+
+
+@dataclass
+class RecordedClassifier:
+    """Replay recorded classifier responses keyed by normalized query.
+
+    Recorded latency and token counts are reported instead of measured ones,
+    so LLM runs can be evaluated without network access.
+    """
+
+    records: dict[str, dict]
+
+    @classmethod
+    def from_rows(cls, rows: list[dict]) -> RecordedClassifier:
+        return cls(records={normalize_query(row["query"]): row for row in rows})
+
+    @classmethod
+    def from_jsonl(cls, path: Path) -> RecordedClassifier:
+        lines = path.read_text(encoding="utf-8").splitlines()
+        return cls.from_rows([json.loads(line) for line in lines if line.strip()])
+
+    def record_for(self, query: str) -> dict:
+        try:
+            return self.records[normalize_query(query)]
+        except KeyError as exc:
+            raise KeyError(f"No recorded classification for query: {query!r}") from exc
+
+    def classify(self, payload: dict) -> IntentClassification:
+        row = self.record_for(payload["query"])
+        return IntentClassification(
+            intent=IntentLabel(row["intent"]),
+            confidence=float(row["confidence"]),
+            rationale=row.get("rationale", "recorded"),
+        )
+
+    def as_runnable(self) -> Runnable:
+        return RunnableLambda(self.classify)
+
+    def recorded_latency_ms(self, item: LabeledQuery) -> float | None:
+        value = self.record_for(item.query).get("latency_ms")
+        return None if value is None else float(value)
+
+    def recorded_tokens(self, item: LabeledQuery) -> int:
+        row = self.record_for(item.query)
+        if "prompt_tokens" not in row:
+            return estimate_llm_classifier_tokens(item)
+        return int(row["prompt_tokens"]) + int(row.get("completion_tokens", 0))
+
+
+def run_classifier(
+    classifier: Runnable,
+    dataset: list[LabeledQuery],
+    *,
+    token_estimator: Callable[[LabeledQuery], int] | None = None,
+    latency_override: Callable[[LabeledQuery], float | None] | None = None,
+) -> list[QueryTrace]:
+    """Classify every dataset entry once, measuring latency and cost."""
+    traces = []
+    for item in dataset:
+        start = time.perf_counter()
+        result: IntentClassification = classifier.invoke({"query": item.query, "history": item.history})
+        latency_ms = (time.perf_counter() - start) * 1000
+        if latency_override is not None:
+            recorded = latency_override(item)
+            latency_ms = latency_ms if recorded is None else recorded
+        traces.append(
+            QueryTrace(
+                query=item.query,
+                label=item.label,
+                predicted=result.intent,
+                confidence=result.confidence,
+                latency_ms=latency_ms,
+                estimated_tokens=token_estimator(item) if token_estimator else 0,
+            )
+        )
+    return traces
+
+
+def routed_label(trace: QueryTrace, threshold: float) -> IntentLabel:
+    """Label the orchestrator would route to under `intent_min_confidence`."""
+    if trace.predicted != IntentLabel.UNKNOWN and trace.confidence >= threshold:
+        return trace.predicted
+    return IntentLabel.UNKNOWN
+
+
+def score_threshold(
+    classifier_name: str,
+    traces: list[QueryTrace],
+    threshold: float,
+    *,
+    agent_latency_ms: float = 0.0,
+    agent_tokens: int = 0,
+) -> OperatingPoint:
+    """Score one threshold.
+
+    `agent_latency_ms`/`agent_tokens` estimate the RAG agent call added to
+    every request routed to HR/TECH, so cost varies with the threshold.
+    """
+    labels = [label.value for label in IntentLabel]
+    confusion = {expected: {predicted: 0 for predicted in labels} for expected in labels}
+    latencies = []
+    tokens = []
+    routed_count = 0
+    for trace in traces:
+        routed = routed_label(trace, threshold)
+        confusion[trace.label.value][routed.value] += 1
+        agent_calls = 0 if routed == IntentLabel.UNKNOWN else 1
+        routed_count += agent_calls
+        latencies.append(trace.latency_ms + agent_calls * agent_latency_ms)
+        tokens.append(trace.estimated_tokens + agent_calls * agent_tokens)
+
+    per_label = {}
+    for label in labels:
+        true_pos = confusion[label][label]
+        predicted_total = sum(confusion[expected][label] for expected in labels)
+        support = sum(confusion[label].values())
+        per_label[label] = LabelMetrics(
+            precision=true_pos / predicted_total if predicted_total else 0.0,
+            recall=true_pos / support if support else 0.0,
+            support=support,
+        )
+
+    correct = sum(confusion[label][label] for label in labels)
+    latencies.sort()
+    p95_index = min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1)))) if latencies else 0
+    return OperatingPoint(
+        classifier=classifier_name,
+        threshold=threshold,
+        accuracy=correct / len(traces) if traces else 0.0,
+        per_label=per_label,
+        confusion=confusion,
+        mean_latency_ms=statistics.fmean(latencies) if latencies else 0.0,
+        p95_latency_ms=latencies[p95_index] if latencies else 0.0,
+        mean_tokens=statistics.fmean(tokens) if tokens else 0.0,
+        routed_share=routed_count / len(traces) if traces else 0.0,
+    )
+
+
+def mark_pareto_front(points: list[OperatingPoint]) -> list[OperatingPoint]:
+    """Flag points not dominated on (accuracy up, latency down, tokens down)."""
+
+    def dominates(a: OperatingPoint, b: OperatingPoint) -> bool:
+        no_worse = (
+            a.accuracy >= b.accuracy
+            and a.mean_latency_ms <= b.mean_latency_ms
+            and a.mean_tokens <= b.mean_tokens
+        )
+        better = (
+            a.accuracy > b.accuracy
+            or a.mean_latency_ms < b.mean_latency_ms
+            or a.mean_tokens < b.mean_tokens
+        )
+        return no_worse and better
+
+    for point in points:
+        point.pareto = not any(dominates(other, point) for other in points if other is not point)
+    return [point for point in points if point.pareto]
+
+
+def evaluate_classifiers(
+    classifiers: dict[str, tuple[Runnable, dict]],
+    dataset: list[LabeledQuery],
+    *,
+    thresholds: tuple[float, ...] = DEFAULT_THRESHOLDS,
+    agent_latency_ms: float = 0.0,
+    agent_tokens: int = 0,
+) -> dict:
+    """Sweep thresholds for each classifier and build the trade-off report.
+
+    `classifiers` maps a name to (runnable, run_classifier keyword options).
+    The report includes per-query traces (latency, estimated tokens) for
+    each classifier alongside the aggregated operating points.
+    """
+    points: list[OperatingPoint] = []
+    traces_by_classifier: dict[str, list[QueryTrace]] = {}
+    for name, (classifier, options) in classifiers.items():
+        traces = run_classifier(classifier, dataset, **options)
+        traces_by_classifier[name] = traces
+        points.extend(
+            score_threshold(
+                name,
+                traces,
+                threshold,
+                agent_latency_ms=agent_latency_ms,
+                agent_tokens=agent_tokens,
+            )
+            for threshold in thresholds
+        )
+    front = mark_pareto_front(points)
+    return {
+        "dataset_size": len(dataset),
+        "agent_cost": {"latency_ms": agent_latency_ms, "tokens": agent_tokens},
+        "traces": {name: [asdict(trace) for trace in traces] for name, traces in traces_by_classifier.items()},
+        "points": [asdict(point) for point in points],
+        "pareto_front": [
+            {
+                "classifier": point.classifier,
+                "threshold": point.threshold,
+                "accuracy": point.accuracy,
+                "mean_latency_ms": point.mean_latency_ms,
+                "mean_tokens": point.mean_tokens,
+            }
+            for point in sorted(front, key=lambda p: (p.mean_latency_ms, p.mean_tokens))
+        ],
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline routing evaluation (accuracy vs latency/cost)")
+    parser.add_argument("--dataset", required=True, type=Path, help="Labeled JSONL dataset")
+    parser.add_argument(
+        "--recordings",
+        type=Path,
+        help="Recorded LLM classifier responses (JSONL) to replay offline.",
+    )
+    parser.add_argument(
+        "--thresholds",
+        default=",".join(str(t) for t in DEFAULT_THRESHOLDS),
+        help="Comma-separated intent_min_confidence values to sweep.",
+    )
+    parser.add_argument(
+        "--agent-latency-ms",
+        type=float,
+        default=0.0,
+        help="Estimated RAG agent latency added to each routed (non-fallback) request.",
+    )
+    parser.add_argument(
+        "--agent-tokens",
+        type=int,
+        default=0,
+        help="Estimated RAG agent tokens added to each routed (non-fallback) request.",
+    )
+    parser.add_argument("--output", type=Path, help="Write JSON report to this path.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    dataset = load_labeled_dataset(args.dataset)
+    thresholds = tuple(float(value) for value in args.thresholds.split(",") if value.strip())
+
+    classifiers: dict[str, tuple[Runnable, dict]] = {
+        "heuristic": (RunnableLambda(lambda x: heuristic_intent_router(x["query"])), {}),
+    }
+    if args.recordings:
+        recorded = RecordedClassifier.from_jsonl(args.recordings)
+        classifiers["llm_recorded"] = (
+            recorded.as_runnable(),
+            {"token_estimator": recorded.recorded_tokens, "latency_override": recorded.recorded_latency_ms},
+        )
+
+    report = evaluate_classifiers(
+        classifiers,
+        dataset,
+        thresholds=thresholds,
+        agent_latency_ms=args.agent_latency_ms,
+        agent_tokens=args.agent_tokens,
+    )
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,38 @@
 
 from __future__ import annotations
 
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableLambda
 
 from .prompts import ORCHESTRATOR_INTENT_PROMPT
 from .schemas import IntentClassification, IntentLabel
+from .text import HR_TERMS, PROMPT_RECENT_TURNS, TECH_TERMS, render_recent_turns
 
 
-
-def build_intent_classifier(llm: BaseChatModel):
+def build_intent_classifier(
+    llm: BaseChatModel,
+    *,
+    callbacks: list[BaseCallbackHandler] | None = None,
+    recent_turns: int = PROMPT_RECENT_TURNS,
+):
     """Build a structured classifier chain.
 
     Returns a runnable that expects: {"query": "..."}
     and outputs IntentClassification.
+    Only the last `recent_turns` history turns plus the conversation digest
+    ("history_digest") are rendered, so the prompt size does not depend on
+    the memory window (MAX_HISTORY_TURNS).
+    callbacks (e.g. token accounting) are attached to the LLM call.
     """
     prompt = ChatPromptTemplate.from_messages(
         [
             ("system", ORCHESTRATOR_INTENT_PROMPT),
             (
                 "human",
-                "Recent conversation history:\n{history}\n\n"
+                "Most recent turns:\n{history}\n\n"
+                "Conversation digest:\n{digest}\n\n"
                 "Current user query:\n{query}\n\n"
                 "Classify intent now.",
             ),
@@ -30,12 +41,9 @@ def build_intent_classifier(llm: BaseChatModel):
     )
 
     def preprocess(payload: dict) -> dict:
-        history_lines = payload.get("history", [])
-        if not history_lines:
-            history = "N/A"
-        else:
-            history = "\n".join(f"- {line}" for line in history_lines)
-        return {"query": payload["query"].strip(), "history": history}
+        history = render_recent_turns(payload.get("history", []), recent_turns)
+        digest = payload.get("history_digest") or "N/A"
+        return {"query": payload["query"].strip(), "history": history, "digest": digest}
 
     def normalize(result: IntentClassification) -> IntentClassification:
         conf = max(0.0, min(1.0, float(result.confidence)))
@@ -43,10 +51,14 @@ def build_intent_classifier(llm: BaseChatModel):
         result.rationale = result.rationale.strip()
         return result
 
+    structured_llm = llm.with_structured_output(IntentClassification, method="function_calling")
+    if callbacks:
+        structured_llm = structured_llm.with_config(callbacks=callbacks)
+
     return (
         RunnableLambda(preprocess)
         | prompt
-        | llm.with_structured_output(IntentClassification, method="function_calling")
+        | structured_llm
         | RunnableLambda(normalize)
     )
 
@@ -56,11 +68,8 @@ def heuristic_intent_router(query: str) -> IntentClassification:
     """Cheap heuristic fallback for tests/local development."""
     text = query.lower()
 
-    hr_terms = ["vacaciones", "beneficios", "onboarding", "rrhh", "desempeno", "reclutamiento"]
-    tech_terms = ["kubernetes", "api", "deploy", "ci/cd", "microserv", "seguridad", "debug"]
-
-    hr_hits = sum(1 for term in hr_terms if term in text)
-    tech_hits = sum(1 for term in tech_terms if term in text)
+    hr_hits = sum(1 for term in HR_TERMS if term in text)
+    tech_hits = sum(1 for term in TECH_TERMS if term in text)
 
     if hr_hits > tech_hits and hr_hits > 0:
         return IntentClassification(intent=IntentLabel.HR, confidence=0.75, rationale="Matched HR keywords")
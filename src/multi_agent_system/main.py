@@ -31,9 +31,8 @@ def parse_args() -> argparse.Namespace:
 def main() -> None:
     args = parse_args()
     settings = load_settings()
-    service = build_multi_agent_service(settings, use_heuristic_router=args.use_heuristic_router)
-
-    result = service.ask(args.query, conversation_id=args.conversation_id)
+    with build_multi_agent_service(settings, use_heuristic_router=args.use_heuristic_router) as service:
+        result = service.ask(args.query, conversation_id=args.conversation_id)
     payload = result.model_dump()
     if args.hide_debug:
         payload.pop("debug", None)
@@ -1,29 +1,90 @@
 """Lightweight in-memory conversation store.
 
 This keeps recent user turns to help intent disambiguation.
+Turns are compacted incrementally on append (de-duplicated and truncated to
+`max_turn_tokens`), and a rolling per-conversation digest accumulates domain
+keyword counts over every appended turn (full text, repeats and turns
+already evicted from the window included). LLM routing prompts read the
+last couple of turns plus the digest, so their size does not grow with
+MAX_HISTORY_TURNS or conversation length.
 Replace with Redis/Postgres in production.
 """
 
 from __future__ import annotations
 
-from collections import defaultdict, deque
+from collections import Counter, defaultdict, deque
 from dataclasses import dataclass, field
 
+from .text import HR_TERMS, TECH_TERMS
+
+
+def truncate_turn(text: str, max_tokens: int) -> str:
+    """Keep the first `max_tokens` whitespace tokens of a turn."""
+    words = text.split()
+    if max_tokens <= 0 or len(words) <= max_tokens:
+        return " ".join(words)
+    return " ".join(words[:max_tokens]) + " ..."
+
+
+@dataclass
+class ConversationDigest:
+    """Rolling summary of every turn appended to a conversation, repeats included."""
+
+    turns_seen: int = 0
+    keyword_counts: Counter = field(default_factory=Counter)
+
+    def update(self, text: str) -> None:
+        lowered = text.lower()
+        self.turns_seen += 1
+        for term in (*HR_TERMS, *TECH_TERMS):
+            if term in lowered:
+                self.keyword_counts[term] += 1
+
+    def domain_counts(self) -> dict[str, int]:
+        return {
+            "HR": sum(self.keyword_counts[term] for term in HR_TERMS),
+            "TECH": sum(self.keyword_counts[term] for term in TECH_TERMS),
+        }
+
+    def render(self, max_keywords: int = 5) -> str:
+        if not self.turns_seen:
+            return ""
+        counts = self.domain_counts()
+        top = ", ".join(f"{term} x{count}" for term, count in self.keyword_counts.most_common(max_keywords))
+        return f"turns={self.turns_seen}; HR={counts['HR']}; TECH={counts['TECH']}; top keywords: {top or 'none'}"
+
 
 @dataclass
 class InMemoryConversationStore:
     max_history_turns: int = 4
+    max_turn_tokens: int = 48
     _store: dict[str, deque[str]] = field(default_factory=lambda: defaultdict(deque))
+    _digests: dict[str, ConversationDigest] = field(default_factory=lambda: defaultdict(ConversationDigest))
 
     def append_user_turn(self, conversation_id: str, query: str) -> None:
+        # The digest sees the full turn; only the stored window is truncated.
+        self._digests[conversation_id].update(query.strip())
+        turn = truncate_turn(query.strip(), self.max_turn_tokens)
+
         history = self._store[conversation_id]
-        history.append(query.strip())
+        key = turn.lower()
+        for existing in list(history):
+            if existing.lower() == key:
+                history.remove(existing)
+        history.append(turn)
         while len(history) > self.max_history_turns:
             history.popleft()
 
     def get_history(self, conversation_id: str) -> list[str]:
         return list(self._store[conversation_id])
 
+    def get_digest(self, conversation_id: str) -> str:
+        if conversation_id not in self._digests:
+            return ""
+        return self._digests[conversation_id].render()
+
     def clear(self, conversation_id: str) -> None:
         if conversation_id in self._store:
             del self._store[conversation_id]
+        if conversation_id in self._digests:
+            del self._digests[conversation_id]
@@ -4,12 +4,13 @@ from __future__ import annotations
 
 import time
 
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.runnables import Runnable, RunnableBranch, RunnableLambda, RunnableParallel
 
 from .intent_classifier import build_intent_classifier
 from .prompts import UNKNOWN_FALLBACK_TEXT
-from .schemas import IntentLabel, RoutedResponse
+from .schemas import IntentClassification, IntentLabel, RoutedResponse
 
 
 
@@ -20,18 +21,27 @@ def build_orchestrator(
     classifier: Runnable | None = None,
     *,
     intent_min_confidence: float = 0.60,
+    classifier_callbacks: list[BaseCallbackHandler] | None = None,
+    fused_agent: Runnable | None = None,
+    fused_min_confidence: float = 0.80,
 ):
     """Build conditional routing pipeline.
 
     classifier can be injected for tests.
+    classifier_callbacks are only used when the default LLM classifier is built.
+    fused_agent (see `build_fused_rag_agent`) enables single-call mode: when
+    its confidence is at or above both thresholds, its HR/TECH answer is used
+    directly and a confident UNKNOWN goes straight to the fallback envelope;
+    low confidence falls back to classify-then-answer.
     """
-    intent_chain = classifier or build_intent_classifier(llm)
+    intent_chain = classifier or build_intent_classifier(llm, callbacks=classifier_callbacks)
 
     preprocess = RunnableLambda(
         lambda payload: {
             "query": payload["query"].strip(),
             "conversation_id": payload.get("conversation_id", "n/a"),
             "history": payload.get("history", []),
+            "history_digest": payload.get("history_digest", ""),
             "_start_ts": time.perf_counter(),
         }
     )
@@ -85,6 +95,34 @@ def build_orchestrator(
         unknown_route,
     )
 
+    two_step = classify | router
+    fused_threshold = max(intent_min_confidence, fused_min_confidence)
+    fused_routes = {IntentLabel.HR: "hr_rag_agent", IntentLabel.TECH: "tech_rag_agent"}
+
+    def fused_or_two_step(payload: dict) -> dict:
+        fused = fused_agent.invoke(
+            {
+                "query": payload["query"],
+                "history": payload["history"],
+                "history_digest": payload["history_digest"],
+            }
+        )
+        if fused.confidence < fused_threshold:
+            routed = two_step.invoke(payload)
+            return {**routed, "mode": "fused_fallback", "fused_confidence": fused.confidence}
+
+        intent = IntentClassification(intent=fused.intent, confidence=fused.confidence, rationale=fused.rationale)
+        if fused.intent not in fused_routes:
+            # Confidently out of scope: skip the two-step path entirely.
+            return {**unknown_route.invoke({"intent": intent, "payload": payload}), "mode": "fused"}
+        return {
+            "intent": intent,
+            "rag": fused,
+            "route_used": fused_routes[fused.intent],
+            "payload": payload,
+            "mode": "fused",
+        }
+
     def envelope(payload: dict) -> RoutedResponse:
         intent = payload["intent"]
         rag = payload["rag"]
@@ -96,6 +134,17 @@ def build_orchestrator(
         evidence_notes = (
             rag.get("evidence_notes", []) if isinstance(rag, dict) else getattr(rag, "evidence_notes", [])
         )
+        debug = {
+            "threshold_used": intent_min_confidence,
+            "history_turns": len(request_payload.get("history", [])),
+            "mode": payload.get("mode", "two_step"),
+            "evidence_notes": evidence_notes,
+        }
+        if debug["mode"] in ("fused", "fused_fallback"):
+            # The fused answer is accepted only at or above the stricter threshold.
+            debug["fused_threshold"] = fused_threshold
+        if "fused_confidence" in payload:
+            debug["fused_confidence"] = payload["fused_confidence"]
 
         return RoutedResponse(
             intent=intent.intent,
@@ -110,11 +159,9 @@ def build_orchestrator(
             conversation_id=request_payload.get("conversation_id", "n/a"),
             processing_ms=max(processing_ms, 0),
             retrieval_hits=max(0, retrieval_hits),
-            debug={
-                "threshold_used": intent_min_confidence,
-                "history_turns": len(request_payload.get("history", [])),
-                "evidence_notes": evidence_notes,
-            },
+            debug=debug,
         )
 
-    return preprocess | classify | router | RunnableLambda(envelope)
+    if fused_agent is None:
+        return preprocess | two_step | RunnableLambda(envelope)
+    return preprocess | RunnableLambda(fused_or_two_step) | RunnableLambda(envelope)
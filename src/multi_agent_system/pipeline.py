@@ -2,40 +2,125 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+from dataclasses import dataclass, field
 
+from langchain_core.retrievers import BaseRetriever
 from langchain_core.runnables import RunnableLambda
 from langchain_openai import ChatOpenAI
 
+from .coalescing import RequestCoalescer, coalescing_key
 from .config import Settings
 from .intent_classifier import heuristic_intent_router
 from .memory import InMemoryConversationStore
 from .orchestrator import build_orchestrator
-from .rag_agents import build_hr_rag_agent, build_tech_rag_agent
-from .retrievers import build_hr_retriever, build_tech_retriever
-from .schemas import RoutedResponse
+from .rag_agents import build_fused_rag_agent, build_hr_rag_agent, build_tech_rag_agent
+from .retrievers import SimpleKeywordRetriever, build_hr_retriever, build_tech_retriever
+from .schemas import IntentLabel, RoutedResponse
+from .sharded_retriever import ShardedKeywordRetriever
+from .telemetry import RequestTokenLedger, TokenAccountant
 
 
 @dataclass
 class MultiAgentService:
-    """Facade around orchestrator pipeline with conversation memory."""
+    """Facade around orchestrator pipeline with conversation memory.
+
+    Concurrent identical requests (same normalized query and history) are
+    coalesced into a single pipeline execution when `coalescer` is set.
+    When `accountant` is set, token usage per stage is added to
+    `debug["token_usage"]` and aggregated per route.
+    """
 
     pipeline: object
     memory: InMemoryConversationStore
+    coalescer: RequestCoalescer | None = field(default_factory=RequestCoalescer)
+    accountant: TokenAccountant | None = None
+    resources: list = field(default_factory=list)
+
+    def close(self) -> None:
+        """Release owned resources (e.g. sharded retriever worker processes)."""
+        for resource in self.resources:
+            resource.close()
+        self.resources.clear()
+
+    def __enter__(self) -> MultiAgentService:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _payload(self, query: str, conversation_id: str) -> dict:
+        return {
+            "query": query,
+            "conversation_id": conversation_id,
+            "history": self.memory.get_history(conversation_id),
+            "history_digest": self.memory.get_digest(conversation_id),
+        }
+
+    def _account(self, result: RoutedResponse, ledger: RequestTokenLedger, *, export: bool = True) -> bool:
+        result.debug["token_usage"] = ledger.snapshot()
+        return self.accountant.record(result.route_used, ledger, export=export)
+
+    def _invoke(self, payload: dict) -> RoutedResponse:
+        if self.accountant is None:
+            return self.pipeline.invoke(payload)
+        with self.accountant.track() as ledger:
+            result = self.pipeline.invoke(payload)
+        self._account(result, ledger)
+        return result
 
-    def ask(self, query: str, *, conversation_id: str = "default") -> RoutedResponse:
-        query = query.strip()
-        history = self.memory.get_history(conversation_id)
-        result: RoutedResponse = self.pipeline.invoke(
-            {
-                "query": query,
+    async def _ainvoke(self, payload: dict) -> RoutedResponse:
+        if self.accountant is None:
+            return await self.pipeline.ainvoke(payload)
+        with self.accountant.track() as ledger:
+            result = await self.pipeline.ainvoke(payload)
+        if self._account(result, ledger, export=False):
+            # Keep the file write off the event loop.
+            await asyncio.to_thread(self.accountant.export)
+        return result
+
+    @staticmethod
+    def _personalize(result: RoutedResponse, conversation_id: str, shared: bool) -> RoutedResponse:
+        if not shared:
+            return result
+        return result.model_copy(
+            update={
                 "conversation_id": conversation_id,
-                "history": history,
-            }
+                "debug": {**result.debug, "coalesced": True},
+            },
+            deep=True,
         )
+
+    def ask(self, query: str, *, conversation_id: str = "default") -> RoutedResponse:
+        query = query.strip()
+        payload = self._payload(query, conversation_id)
+        if self.coalescer is None:
+            result = self._invoke(payload)
+        else:
+            key = coalescing_key(query, payload["history"], payload["history_digest"])
+            result, shared = self.coalescer.run(key, lambda: self._invoke(payload))
+            result = self._personalize(result, conversation_id, shared)
         self.memory.append_user_turn(conversation_id, query)
         return result
 
+    async def aask(self, query: str, *, conversation_id: str = "default") -> RoutedResponse:
+        query = query.strip()
+        payload = self._payload(query, conversation_id)
+        if self.coalescer is None:
+            result = await self._ainvoke(payload)
+        else:
+            key = coalescing_key(query, payload["history"], payload["history_digest"])
+            result, shared = await self.coalescer.arun(key, lambda: self._ainvoke(payload))
+            result = self._personalize(result, conversation_id, shared)
+        self.memory.append_user_turn(conversation_id, query)
+        return result
+
+
+def _maybe_shard(retriever: SimpleKeywordRetriever, shards: int) -> BaseRetriever:
+    if shards <= 1:
+        return retriever
+    return ShardedKeywordRetriever(docs=retriever.docs, k=retriever.k, shards=shards)
+
 
 
 def build_multi_agent_service(
@@ -50,12 +135,24 @@ def build_multi_agent_service(
         use_heuristic_router: Skip LLM intent classification and use keyword heuristic.
     """
     llm = ChatOpenAI(model=settings.openai_model, api_key=settings.openai_api_key, temperature=0.2)
+    accountant = TokenAccountant(
+        export_path=settings.token_usage_export_path,
+        export_interval_s=settings.token_usage_export_interval_s,
+    )
 
-    hr_retriever = build_hr_retriever(settings.project_root)
-    tech_retriever = build_tech_retriever(settings.project_root)
+    hr_retriever = _maybe_shard(build_hr_retriever(settings.project_root), settings.retriever_shards)
+    tech_retriever = _maybe_shard(build_tech_retriever(settings.project_root), settings.retriever_shards)
 
-    hr_agent = build_hr_rag_agent(llm, hr_retriever)
-    tech_agent = build_tech_rag_agent(llm, tech_retriever)
+    hr_agent = build_hr_rag_agent(llm, hr_retriever, callbacks=[accountant.callback("hr_rag_agent")])
+    tech_agent = build_tech_rag_agent(llm, tech_retriever, callbacks=[accountant.callback("tech_rag_agent")])
+
+    fused_agent = None
+    if settings.fused_mode and not use_heuristic_router:
+        fused_agent = build_fused_rag_agent(
+            llm,
+            {IntentLabel.HR: hr_retriever, IntentLabel.TECH: tech_retriever},
+            callbacks=[accountant.callback("fused_agent")],
+        )
 
     classifier = None
     if use_heuristic_router:
@@ -67,10 +164,27 @@ def build_multi_agent_service(
         tech_agent=tech_agent,
         classifier=classifier,
         intent_min_confidence=settings.intent_min_confidence,
+        classifier_callbacks=[accountant.callback("intent_classifier")],
+        fused_agent=fused_agent,
+        fused_min_confidence=settings.fused_min_confidence,
     )
 
-    memory = InMemoryConversationStore(max_history_turns=settings.max_history_turns)
-    return MultiAgentService(pipeline=orchestrator, memory=memory)
+    memory = InMemoryConversationStore(
+        max_history_turns=settings.max_history_turns,
+        max_turn_tokens=settings.max_turn_tokens,
+    )
+    resources = [
+        retriever for retriever in (hr_retriever, tech_retriever) if isinstance(retriever, ShardedKeywordRetriever)
+    ]
+    # Pay the worker spawn cost here instead of on the first query.
+    try:
+        for retriever in resources:
+            retriever.start()
+    except BaseException:
+        for retriever in resources:
+            retriever.close()
+        raise
+    return MultiAgentService(pipeline=orchestrator, memory=memory, accountant=accountant, resources=resources)
 
 
 
@@ -50,7 +50,27 @@ Grounding rules:
 - If information is incomplete, be explicit and ask one targeted follow-up.
 """.strip()
 
+FUSED_ROUTER_RAG_PROMPT = """
+You are ORQUESTA-RAG, an intent router and domain specialist in a single step.
+
+Mission:
+- Pick exactly one label: HR, TECH, or UNKNOWN, using the same policy as the router:
+  HR for people operations, TECH for software and infrastructure, UNKNOWN if ambiguous.
+- Then answer the query using only the retrieved context of the domain you picked.
+
+Behavior constraints:
+- Never mix context from the other domain into the answer.
+- Cite source identifiers from the chosen domain only.
+- Confidence is about the routing decision; be honest when both domains compete.
+- If confidence < 0.60 or no domain fits, return UNKNOWN and leave the answer short.
+""".strip()
+
 UNKNOWN_FALLBACK_TEXT = (
     "No pude determinar con seguridad si la consulta corresponde a RRHH o Tecnologia. "
     "Comparte mas contexto (ejemplos, sistema, politica o proceso) para rutearla correctamente."
 )
+
+SHED_FALLBACK_TEXT = (
+    "El sistema esta con alta demanda y no pudo procesar tu consulta a tiempo. "
+    "Reintenta en unos segundos; si es urgente, indica si es un tema de RRHH o de Tecnologia."
+)
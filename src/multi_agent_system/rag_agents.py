@@ -2,14 +2,18 @@
 
 from __future__ import annotations
 
+from operator import itemgetter
+
 #from DomainRAG (LangChain)langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.retrievers import BaseRetriever
-from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables import RunnableLambda, RunnableParallel, RunnablePassthrough
 
-from .prompts import HR_AGENT_PROMPT, TECH_AGENT_PROMPT
-from .schemas import RAGAnswer
+from .prompts import FUSED_ROUTER_RAG_PROMPT, HR_AGENT_PROMPT, TECH_AGENT_PROMPT
+from .schemas import FusedRAGAnswer, IntentLabel, RAGAnswer
+from .text import PROMPT_RECENT_TURNS, render_recent_turns
 
 
 
@@ -32,6 +36,8 @@ def _build_domain_rag_agent(
     retriever: BaseRetriever,
     system_prompt: str,
     domain: str,
+    *,
+    callbacks: list[BaseCallbackHandler] | None = None,
 ):
     prompt = ChatPromptTemplate.from_messages(
         [
@@ -66,21 +72,114 @@ def _build_domain_rag_agent(
             result.evidence_notes = [f"{payload['retrieval_hits']} context chunks retrieved for {domain}"]
         return result
 
+    structured_llm = llm.with_structured_output(RAGAnswer, method="function_calling")
+    if callbacks:
+        structured_llm = structured_llm.with_config(callbacks=callbacks)
+
     return (
         RunnableLambda(enrich)
         | {
             "payload": RunnableLambda(lambda x: x),
-            "result": prompt | llm.with_structured_output(RAGAnswer, method="function_calling"),
+            "result": prompt | structured_llm,
         }
         | RunnableLambda(lambda x: merge_citations(x["result"], x["payload"]))
     )
 
 
 
-def build_hr_rag_agent(llm: BaseChatModel, retriever: BaseRetriever):
-    return _build_domain_rag_agent(llm, retriever, HR_AGENT_PROMPT, domain="HR")
+def build_hr_rag_agent(
+    llm: BaseChatModel,
+    retriever: BaseRetriever,
+    *,
+    callbacks: list[BaseCallbackHandler] | None = None,
+):
+    return _build_domain_rag_agent(llm, retriever, HR_AGENT_PROMPT, domain="HR", callbacks=callbacks)
+
+
 
+def build_tech_rag_agent(
+    llm: BaseChatModel,
+    retriever: BaseRetriever,
+    *,
+    callbacks: list[BaseCallbackHandler] | None = None,
+):
+    return _build_domain_rag_agent(llm, retriever, TECH_AGENT_PROMPT, domain="TECH", callbacks=callbacks)
 
 
-def build_tech_rag_agent(llm: BaseChatModel, retriever: BaseRetriever):
-    return _build_domain_rag_agent(llm, retriever, TECH_AGENT_PROMPT, domain="TECH")
+
+def build_fused_rag_agent(
+    llm: BaseChatModel,
+    retrievers: dict[IntentLabel, BaseRetriever],
+    *,
+    callbacks: list[BaseCallbackHandler] | None = None,
+    recent_turns: int = PROMPT_RECENT_TURNS,
+):
+    """Classify and answer in one structured call.
+
+    Retrieval runs first, in parallel, for every candidate domain in
+    `retrievers`; the model then picks the domain and answers from that
+    domain's context only.
+    Expects {"query": "...", "history": [...], "history_digest": "..."} and
+    outputs FusedRAGAnswer. Like the intent classifier, only the last
+    `recent_turns` turns plus the digest reach the prompt.
+    """
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", FUSED_ROUTER_RAG_PROMPT),
+            (
+                "human",
+                "Most recent turns:\n{history}\n\n"
+                "Conversation digest:\n{digest}\n\n"
+                "User query: {query}\n\n"
+                "Retrieved context by domain:\n{context}\n\n"
+                "Pick the domain and answer using only its retrieved evidence.",
+            ),
+        ]
+    )
+
+    # One retrieval per candidate domain, run concurrently and keyed by label.
+    retrieve_all = RunnableParallel(
+        {label.value: itemgetter("query") | retriever for label, retriever in retrievers.items()}
+    )
+
+    def enrich(inputs: dict) -> dict:
+        payload = inputs["payload"]
+        sections = []
+        seeds = {}
+        for label_value, docs in inputs["docs"].items():
+            context, citations = _format_docs_with_sources(docs)
+            sections.append(f"### {label_value}\n{context or 'N/A'}")
+            seeds[IntentLabel(label_value)] = (citations, len(docs))
+        history = render_recent_turns(payload.get("history", []), recent_turns)
+        digest = payload.get("history_digest") or "N/A"
+        return {
+            "query": payload["query"],
+            "history": history,
+            "digest": digest,
+            "context": "\n\n".join(sections),
+            "seeds": seeds,
+        }
+
+    def merge_citations(result: FusedRAGAnswer, payload: dict) -> FusedRAGAnswer:
+        result.confidence = max(0.0, min(1.0, float(result.confidence)))
+        result.rationale = result.rationale.strip()
+        citations, hits = payload["seeds"].get(result.intent, ([], 0))
+        result.citations = list(dict.fromkeys([*result.citations, *citations]))
+        result.retrieval_hits = max(result.retrieval_hits, hits)
+        if not result.evidence_notes:
+            result.evidence_notes = [f"{hits} context chunks retrieved for {result.intent.value} (fused call)"]
+        return result
+
+    structured_llm = llm.with_structured_output(FusedRAGAnswer, method="function_calling")
+    if callbacks:
+        structured_llm = structured_llm.with_config(callbacks=callbacks)
+
+    return (
+        {"payload": RunnablePassthrough(), "docs": retrieve_all}
+        | RunnableLambda(enrich)
+        | {
+            "payload": RunnableLambda(lambda x: x),
+            "result": prompt | structured_llm,
+        }
+        | RunnableLambda(lambda x: merge_citations(x["result"], x["payload"]))
+    )
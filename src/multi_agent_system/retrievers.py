@@ -36,6 +36,16 @@ def _tokens(text: str) -> list[str]:
     return [t for t in text.split() if t and t not in STOPWORDS and len(t) > 2]
 
 
+def _keyword_score(query_tokens: list[str], content_lower: str) -> int:
+    overlap = sum(1 for token in set(query_tokens) if token in content_lower)
+    phrase_bonus = sum(1 for token in query_tokens if token in content_lower)
+    return overlap * 2 + phrase_bonus
+
+
+def _with_score(doc: Document, value: int) -> Document:
+    return Document(page_content=doc.page_content, metadata={**doc.metadata, "keyword_score": value})
+
+
 class SimpleKeywordRetriever(BaseRetriever):
     """Small baseline retriever based on token overlap.
 
@@ -52,33 +62,16 @@ class SimpleKeywordRetriever(BaseRetriever):
         run_manager: CallbackManagerForRetrieverRun,
     ) -> list[Document]:
         query_tokens = _tokens(query)
-        token_set = set(query_tokens)
 
         def score(doc: Document) -> int:
-            content_lower = doc.page_content.lower()
-            overlap = sum(1 for token in token_set if token in content_lower)
-            phrase_bonus = 0
-            for token in query_tokens:
-                if token in content_lower:
-                    phrase_bonus += 1
-            return overlap * 2 + phrase_bonus
+            return _keyword_score(query_tokens, doc.page_content.lower())
 
         ranked = sorted(self.docs, key=score, reverse=True)
         best = ranked[: self.k]
         if not best:
             return []
 
-        scored_docs: list[Document] = []
-        for doc in best:
-            value = score(doc)
-            scored_docs.append(
-                Document(
-                    page_content=doc.page_content,
-                    metadata={**doc.metadata, "keyword_score": value},
-                )
-            )
-        return scored_docs
-
+        return [_with_score(doc, score(doc)) for doc in best]
 
 
 def _split_markdown_to_docs(text: str, source: str) -> list[Document]:
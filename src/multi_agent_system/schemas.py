@@ -28,6 +28,19 @@ class RAGAnswer(BaseModel):
     evidence_notes: list[str] = Field(default_factory=list)
 
 
+class FusedRAGAnswer(BaseModel):
+    """Single-call output: routing decision plus grounded answer."""
+
+    intent: IntentLabel
+    confidence: float = Field(ge=0.0, le=1.0)
+    rationale: str
+    answer: str
+    citations: list[str]
+    follow_up_question: str
+    retrieval_hits: int = Field(ge=0, default=0)
+    evidence_notes: list[str] = Field(default_factory=list)
+
+
 class RoutedResponse(BaseModel):
     intent: IntentLabel
     confidence: float = Field(ge=0.0, le=1.0)
@@ -0,0 +1,131 @@
+"""Sharded scatter-gather keyword retrieval across worker processes.
+
+Each worker process holds one shard of the domain chunks (sent once, at
+worker start) with pre-lowercased contents. A query is fanned out to every
+shard, each shard returns its local top-k, and the parent merges them into
+the global top-k. Ranking matches `SimpleKeywordRetriever`: score
+descending, ties broken by original document order.
+"""
+
+from __future__ import annotations
+
+import heapq
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+
+from .retrievers import _keyword_score, _tokens, _with_score
+
+# Per-process shard state: list of (global_index, lowered_content).
+_SHARD: list[tuple[int, str]] = []
+
+
+def _load_shard(entries: list[tuple[int, str]]) -> None:
+    global _SHARD
+    _SHARD = [(index, content.lower()) for index, content in entries]
+
+
+def _shard_size() -> int:
+    return len(_SHARD)
+
+
+def _search_shard(query_tokens: list[str], k: int) -> list[tuple[int, int]]:
+    """Return the shard-local top-k as (score, global_index) pairs."""
+    scored = ((_keyword_score(query_tokens, content), index) for index, content in _SHARD)
+    return heapq.nsmallest(k, scored, key=lambda item: (-item[0], item[1]))
+
+
+def partition(n_docs: int, n_shards: int) -> list[range]:
+    """Split document indexes into `n_shards` contiguous, balanced ranges."""
+    n_shards = max(1, min(n_shards, n_docs or 1))
+    size, extra = divmod(n_docs, n_shards)
+    ranges, start = [], 0
+    for shard in range(n_shards):
+        end = start + size + (1 if shard < extra else 0)
+        ranges.append(range(start, end))
+        start = end
+    return ranges
+
+
+class ShardedKeywordRetriever(BaseRetriever):
+    """Drop-in `BaseRetriever` that scores shards in parallel processes.
+
+    Workers start lazily on the first query (thread-safe), or eagerly with
+    `start()`; call `close()` (or use the retriever as a context manager) to
+    shut them down. Workers use the "spawn" start method by default: forking
+    a multi-threaded service process is unsafe. A spawned worker re-imports
+    the package, which takes seconds, so services should `start()` the
+    retriever before taking traffic.
+    """
+
+    docs: list[Document]
+    k: int = 4
+    shards: int = 2
+    start_method: str | None = "spawn"
+
+    _executors: list[ProcessPoolExecutor] = PrivateAttr(default_factory=list)
+    _start_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _ensure_started(self) -> list[ProcessPoolExecutor]:
+        executors = self._executors
+        if executors:
+            return executors
+        with self._start_lock:
+            if not self._executors:
+                context = multiprocessing.get_context(self.start_method)
+                started = []
+                for indexes in partition(len(self.docs), self.shards):
+                    entries = [(index, self.docs[index].page_content) for index in indexes]
+                    started.append(
+                        ProcessPoolExecutor(
+                            max_workers=1,
+                            mp_context=context,
+                            initializer=_load_shard,
+                            initargs=(entries,),
+                        )
+                    )
+                self._executors = started
+            return self._executors
+
+    @property
+    def started(self) -> bool:
+        return bool(self._executors)
+
+    def start(self) -> ShardedKeywordRetriever:
+        """Spawn every shard worker and load its shard; returns self."""
+        futures = [executor.submit(_shard_size) for executor in self._ensure_started()]
+        for future in futures:
+            future.result()
+        return self
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        if not self.docs or self.k <= 0:
+            return []
+        executors = self._ensure_started()
+        query_tokens = _tokens(query)
+        futures = [executor.submit(_search_shard, query_tokens, self.k) for executor in executors]
+        candidates = [hit for future in futures for hit in future.result()]
+        best = heapq.nsmallest(self.k, candidates, key=lambda item: (-item[0], item[1]))
+        return [_with_score(self.docs[index], value) for value, index in best]
+
+    def close(self) -> None:
+        with self._start_lock:
+            executors, self._executors = self._executors, []
+        for executor in executors:
+            executor.shutdown(wait=True)
+
+    def __enter__(self) -> ShardedKeywordRetriever:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,176 @@
+"""Token and cost accounting per stage and per route.
+
+A `TokenUsageCallback` is attached to every LLM-backed runnable (intent
+classifier, domain RAG agents). Usage is collected into a per-request ledger
+bound through a context variable, then aggregated per `route_used` by the
+`TokenAccountant`, which periodically exports totals to a local JSON file.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TokenUsage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    llm_calls: int = 0
+
+    def add(self, other: TokenUsage) -> None:
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.total_tokens += other.total_tokens
+        self.llm_calls += other.llm_calls
+
+
+def usage_from_llm_result(response: LLMResult) -> TokenUsage:
+    """Extract token usage from a LangChain LLM result.
+
+    Prefers per-message `usage_metadata` and falls back to the provider
+    `llm_output["token_usage"]` block (OpenAI style).
+    """
+    usage = TokenUsage(llm_calls=1)
+    found = False
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                found = True
+                usage.prompt_tokens += int(metadata.get("input_tokens", 0))
+                usage.completion_tokens += int(metadata.get("output_tokens", 0))
+                usage.total_tokens += int(metadata.get("total_tokens", 0))
+    if not found:
+        raw = (response.llm_output or {}).get("token_usage") or {}
+        usage.prompt_tokens = int(raw.get("prompt_tokens", 0))
+        usage.completion_tokens = int(raw.get("completion_tokens", 0))
+        usage.total_tokens = int(raw.get("total_tokens", 0))
+    if not usage.total_tokens:
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+    return usage
+
+
+@dataclass
+class RequestTokenLedger:
+    """Token usage of a single request, keyed by pipeline stage."""
+
+    stages: dict[str, TokenUsage] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(self, stage: str, usage: TokenUsage) -> None:
+        with self._lock:
+            self.stages.setdefault(stage, TokenUsage()).add(usage)
+
+    def total(self) -> TokenUsage:
+        total = TokenUsage()
+        with self._lock:
+            for usage in self.stages.values():
+                total.add(usage)
+        return total
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            stages = {stage: asdict(usage) for stage, usage in self.stages.items()}
+        return {"stages": stages, "total": asdict(self.total())}
+
+
+_current_ledger: ContextVar[RequestTokenLedger | None] = ContextVar("token_ledger", default=None)
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Record LLM token usage for `stage` into the active request ledger."""
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        ledger = _current_ledger.get()
+        if ledger is not None:
+            ledger.record(self.stage, usage_from_llm_result(response))
+
+
+@dataclass
+class TokenAccountant:
+    """In-process rolling token totals per route with periodic file export.
+
+    Export is request-triggered: there is no background timer, so the file
+    is written by the first request recorded after `export_interval_s` has
+    elapsed (idle processes do not export). `record` returns whether an
+    export is due so async callers can run it off the event loop.
+    """
+
+    export_path: Path | None = None
+    export_interval_s: float = 60.0
+    totals: dict[str, TokenUsage] = field(default_factory=dict)
+    requests: dict[str, int] = field(default_factory=dict)
+    _last_export: float = field(default_factory=time.monotonic)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def callback(self, stage: str) -> TokenUsageCallback:
+        return TokenUsageCallback(stage)
+
+    @contextmanager
+    def track(self) -> Iterator[RequestTokenLedger]:
+        """Bind a fresh ledger to the current context for one request."""
+        ledger = RequestTokenLedger()
+        token = _current_ledger.set(ledger)
+        try:
+            yield ledger
+        finally:
+            _current_ledger.reset(token)
+
+    def record(self, route_used: str, ledger: RequestTokenLedger, *, export: bool = True) -> bool:
+        """Aggregate one request; export inline when due unless `export=False`.
+
+        Returns True when an export was due (and claimed by this call).
+        """
+        with self._lock:
+            self.totals.setdefault(route_used, TokenUsage()).add(ledger.total())
+            self.requests[route_used] = self.requests.get(route_used, 0) + 1
+            now = time.monotonic()
+            due = now - self._last_export >= self.export_interval_s
+            if due:
+                self._last_export = now
+        if due and export:
+            self.export()
+        return due
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                route: {**asdict(usage), "requests": self.requests.get(route, 0)}
+                for route, usage in self.totals.items()
+            }
+
+    def export(self) -> None:
+        """Write current totals as JSON (atomic replace). No-op without path.
+
+        Export failures are logged and swallowed: telemetry must never fail
+        the request that happened to trigger it.
+        """
+        with self._lock:
+            self._last_export = time.monotonic()
+        if self.export_path is None:
+            return
+        payload = {"exported_at": time.time(), "routes": self.snapshot()}
+        tmp_path = self.export_path.with_suffix(self.export_path.suffix + ".tmp")
+        try:
+            self.export_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            tmp_path.replace(self.export_path)
+        except OSError:
+            logger.warning("Token usage export to %s failed", self.export_path, exc_info=True)
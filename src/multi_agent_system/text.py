@@ -0,0 +1,24 @@
+"""Dependency-free text helpers shared across modules."""
+
+from __future__ import annotations
+
+# Domain keywords used by the heuristic router and the conversation digest.
+HR_TERMS = ("vacaciones", "beneficios", "onboarding", "rrhh", "desempeno", "reclutamiento")
+TECH_TERMS = ("kubernetes", "api", "deploy", "ci/cd", "microserv", "seguridad", "debug")
+
+# History turns rendered into LLM routing prompts; older context reaches the
+# model only through the conversation digest, independent of MAX_HISTORY_TURNS.
+PROMPT_RECENT_TURNS = 2
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query or history turn."""
+    return " ".join(query.lower().split())
+
+
+def render_recent_turns(history: list[str], recent_turns: int = PROMPT_RECENT_TURNS) -> str:
+    """Bullet list of the last `recent_turns` history turns ("N/A" if none)."""
+    recent = history[-recent_turns:] if recent_turns > 0 else []
+    if not recent:
+        return "N/A"
+    return "\n".join(f"- {line}" for line in recent)
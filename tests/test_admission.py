@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.runnables import RunnableLambda
+
+from multi_agent_system.admission import AdaptiveConcurrencyLimit, AdmissionController, Priority
+from multi_agent_system.memory import InMemoryConversationStore
+from multi_agent_system.pipeline import MultiAgentService
+from multi_agent_system.schemas import IntentLabel, RoutedResponse
+
+
+def _blocking_service(release: threading.Event, order: list[str]) -> MultiAgentService:
+    def pipeline(payload: dict) -> RoutedResponse:
+        order.append(payload["query"])
+        release.wait(timeout=5)
+        return RoutedResponse(
+            intent=IntentLabel.TECH,
+            confidence=0.9,
+            rationale="n/a",
+            answer="ok",
+            citations=[],
+            follow_up_question="?",
+            route_used="tech_rag_agent",
+            conversation_id=payload["conversation_id"],
+            processing_ms=1,
+            retrieval_hits=0,
+        )
+
+    return MultiAgentService(
+        pipeline=RunnableLambda(pipeline),
+        memory=InMemoryConversationStore(),
+        coalescer=None,
+    )
+
+
+def _wait_for(predicate) -> None:
+    deadline = time.monotonic() + 5
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_admission_sheds_when_queue_full_and_prioritizes_waiters() -> None:
+    release, order = threading.Event(), []
+    controller = AdmissionController(
+        service=_blocking_service(release, order),
+        max_queue_size=2,
+        max_wait_s=5.0,
+        limiter=AdaptiveConcurrencyLimit(limit=1, max_limit=1),
+    )
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        running = pool.submit(controller.ask, "kubernetes uno", conversation_id="a")
+        _wait_for(lambda: order == ["kubernetes uno"])
+        low = pool.submit(controller.ask, "kubernetes low", conversation_id="b", priority=Priority.LOW)
+        _wait_for(lambda: controller.metrics()["queue_depth"] == 1)
+        high = pool.submit(controller.ask, "kubernetes high", conversation_id="c", priority=Priority.HIGH)
+        _wait_for(lambda: controller.metrics()["queue_depth"] == 2)
+
+        shed = controller.ask("politica de vacaciones", conversation_id="d", priority=Priority.LOW)
+        assert shed.route_used == "fallback_unknown"
+        assert shed.intent == IntentLabel.HR
+        assert shed.debug["shed"] == "queue_full"
+
+        release.set()
+        results = [future.result() for future in (running, low, high)]
+
+    assert order == ["kubernetes uno", "kubernetes high", "kubernetes low"]
+    assert all(result.route_used == "tech_rag_agent" for result in results)
+    metrics = controller.metrics()
+    assert metrics["admitted"] == 3
+    assert metrics["shed"] == {"queue_full": 1}
+    assert metrics["in_flight"] == 0
+
+
+def test_admission_keeps_conversation_order_and_times_out_async() -> None:
+    release, order = threading.Event(), []
+    controller = AdmissionController(
+        service=_blocking_service(release, order),
+        max_wait_s=0.1,
+        limiter=AdaptiveConcurrencyLimit(limit=4, max_limit=4),
+    )
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        first = pool.submit(controller.ask, "deploy uno", conversation_id="same")
+        _wait_for(lambda: order == ["deploy uno"])
+        # Capacity is free, but the conversation already has a request in flight.
+        second = asyncio.run(controller.aask("deploy dos", conversation_id="same"))
+        release.set()
+        first.result()
+
+    assert second.debug["shed"] == "timeout"
+    assert order == ["deploy uno"]
+    assert controller.metrics()["shed"] == {"timeout": 1}
+
+
+def test_adaptive_concurrency_limit_backs_off_on_slow_requests() -> None:
+    limiter = AdaptiveConcurrencyLimit(limit=10, max_limit=10, target_latency_s=1.0)
+    limiter.observe(3.0)
+    assert limiter.current == 7
+    for _ in range(20):
+        limiter.observe(0.2)
+    assert limiter.current == 9
+    limiter.observe(0.2, ok=False)
+    assert limiter.current == 6
+
+
+
+def test_admission_admits_directly_when_slots_are_free() -> None:
+    release, order = threading.Event(), []
+    controller = AdmissionController(
+        service=_blocking_service(release, order),
+        max_queue_size=0,
+        max_wait_s=5.0,
+        limiter=AdaptiveConcurrencyLimit(limit=4, max_limit=4),
+    )
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        busy = pool.submit(controller.ask, "deploy uno", conversation_id="same")
+        _wait_for(lambda: order == ["deploy uno"])
+        # The same conversation has to wait, and the queue bound is 0.
+        blocked = controller.ask("deploy dos", conversation_id="same")
+        assert blocked.debug["shed"] == "queue_full"
+        # Another conversation still gets a free slot without queueing.
+        other = pool.submit(controller.ask, "deploy otro", conversation_id="other")
+        _wait_for(lambda: len(order) == 2)
+        release.set()
+        assert busy.result().route_used == "tech_rag_agent"
+        assert other.result().route_used == "tech_rag_agent"
+
+    metrics = controller.metrics()
+    assert metrics["admitted"] == 2
+    assert metrics["shed"] == {"queue_full": 1}
+    assert metrics["max_queue_depth"] == 0
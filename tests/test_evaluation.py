@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from multi_agent_system.evaluation import (
+    LabeledQuery,
+    RecordedClassifier,
+    evaluate_classifiers,
+    load_labeled_dataset,
+    run_classifier,
+    score_threshold,
+)
+from multi_agent_system.schemas import IntentLabel
+
+DATA = Path(__file__).resolve().parents[1] / "data" / "eval"
+
+
+def _recorded(rows: list[tuple[str, str, float, float]]) -> RecordedClassifier:
+    return RecordedClassifier.from_rows(
+        [
+            {"query": query, "intent": intent, "confidence": conf, "latency_ms": latency}
+            for query, intent, conf, latency in rows
+        ]
+    )
+
+
+def test_score_threshold_reports_confusion_and_per_label_metrics() -> None:
+    dataset = [
+        LabeledQuery(query="vacaciones", label=IntentLabel.HR),
+        LabeledQuery(query="kubernetes", label=IntentLabel.TECH),
+        LabeledQuery(query="cafe", label=IntentLabel.UNKNOWN),
+    ]
+    recorded = _recorded(
+        [("vacaciones", "HR", 0.9, 500.0), ("kubernetes", "HR", 0.55, 500.0), ("cafe", "UNKNOWN", 0.8, 500.0)]
+    )
+    traces = run_classifier(recorded.as_runnable(), dataset, latency_override=recorded.recorded_latency_ms)
+
+    low = score_threshold("llm", traces, 0.5)
+    assert low.confusion["TECH"]["HR"] == 1
+    assert low.per_label["HR"].precision == 0.5
+    assert low.per_label["TECH"].recall == 0.0
+
+    high = score_threshold("llm", traces, 0.6)
+    assert high.confusion["TECH"]["UNKNOWN"] == 1
+    assert high.per_label["HR"].precision == 1.0
+    assert high.mean_latency_ms == 500.0
+
+
+def test_evaluate_classifiers_offline_pareto_front() -> None:
+    dataset = load_labeled_dataset(DATA / "routing_labeled.jsonl")
+    slow_accurate = RecordedClassifier.from_jsonl(DATA / "llm_recordings.jsonl")
+    fast_weak = _recorded([(item.query, "UNKNOWN", 0.5, 1.0) for item in dataset])
+
+    report = evaluate_classifiers(
+        {
+            "llm": (
+                slow_accurate.as_runnable(),
+                {"token_estimator": slow_accurate.recorded_tokens, "latency_override": slow_accurate.recorded_latency_ms},
+            ),
+            "fast": (fast_weak.as_runnable(), {"latency_override": fast_weak.recorded_latency_ms}),
+        },
+        dataset,
+        thresholds=(0.5, 0.6),
+    )
+
+    front = {(point["classifier"], point["threshold"]) for point in report["pareto_front"]}
+    assert ("llm", 0.6) in front
+    assert ("llm", 0.5) not in front
+    assert ("fast", 0.5) in front
+    assert report["dataset_size"] == len(dataset)
+
+
+
+def test_threshold_sweep_adds_agent_cost_for_routed_requests_and_keeps_traces() -> None:
+    dataset = [
+        LabeledQuery(query="vacaciones", label=IntentLabel.HR),
+        LabeledQuery(query="kubernetes", label=IntentLabel.TECH),
+    ]
+    recorded = _recorded([("vacaciones", "HR", 0.9, 100.0), ("kubernetes", "TECH", 0.55, 100.0)])
+
+    report = evaluate_classifiers(
+        {"llm": (recorded.as_runnable(), {"latency_override": recorded.recorded_latency_ms})},
+        dataset,
+        thresholds=(0.5, 0.6),
+        agent_latency_ms=1000.0,
+        agent_tokens=500,
+    )
+
+    by_threshold = {point["threshold"]: point for point in report["points"]}
+    assert by_threshold[0.5]["mean_latency_ms"] == 1100.0
+    assert by_threshold[0.6]["mean_latency_ms"] == 600.0
+    assert by_threshold[0.6]["mean_tokens"] == 250.0
+    assert by_threshold[0.6]["routed_share"] == 0.5
+    assert [trace["latency_ms"] for trace in report["traces"]["llm"]] == [100.0, 100.0]
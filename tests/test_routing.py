@@ -1,18 +1,56 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
 from langchain_core.runnables import RunnableLambda
 
-from multi_agent_system.intent_classifier import heuristic_intent_router
+from multi_agent_system.intent_classifier import build_intent_classifier, heuristic_intent_router
 from multi_agent_system.memory import InMemoryConversationStore
 from multi_agent_system.orchestrator import build_orchestrator
 from multi_agent_system.pipeline import MultiAgentService
-from multi_agent_system.schemas import IntentClassification, IntentLabel, RoutedResponse
+from multi_agent_system.rag_agents import build_fused_rag_agent
+from multi_agent_system.retrievers import SimpleKeywordRetriever, load_domain_docs
+from multi_agent_system.schemas import FusedRAGAnswer, IntentClassification, IntentLabel, RoutedResponse
+from multi_agent_system.telemetry import TokenAccountant
 
 
 class DummyLLM:
     """Placeholder object, not used when classifier is injected."""
 
 
+class ToolCallingFakeChatModel(BaseChatModel):
+    """Answers every call with one tool call carrying `tool_args`; records prompts."""
+
+    tool_args: dict
+    prompts: list[str] = []
+    tool_name: str = ""
+
+    @property
+    def _llm_type(self) -> str:
+        return "tool-calling-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        self.tool_name = tools[0].__name__
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.prompts.append("\n".join(str(message.content) for message in messages))
+        message = AIMessage(
+            content="",
+            tool_calls=[{"name": self.tool_name, "args": dict(self.tool_args), "id": "call-1"}],
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
 
 def test_heuristic_classifier_hr() -> None:
     result = heuristic_intent_router("Necesito revisar politica de vacaciones y beneficios")
@@ -104,3 +142,347 @@ def test_multi_agent_service_appends_history() -> None:
     service.ask("consulta uno", conversation_id="thread-1")
     service.ask("consulta dos", conversation_id="thread-1")
     assert memory.get_history("thread-1") == ["consulta uno", "consulta dos"]
+
+
+
+def _echo_response(payload: dict) -> RoutedResponse:
+    return RoutedResponse(
+        intent=IntentLabel.TECH,
+        confidence=0.9,
+        rationale="n/a",
+        answer=f"answer for {payload['query']}",
+        citations=[],
+        follow_up_question="?",
+        route_used="tech_rag_agent",
+        conversation_id=payload["conversation_id"],
+        processing_ms=1,
+        retrieval_hits=0,
+        debug={},
+    )
+
+
+def test_multi_agent_service_coalesces_concurrent_identical_requests() -> None:
+    calls = []
+    release = threading.Event()
+
+    def slow_pipeline(payload: dict) -> RoutedResponse:
+        calls.append(payload["conversation_id"])
+        release.wait(timeout=5)
+        return _echo_response(payload)
+
+    service = MultiAgentService(
+        pipeline=RunnableLambda(slow_pipeline),
+        memory=InMemoryConversationStore(max_history_turns=3),
+    )
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [
+            pool.submit(service.ask, "  Deploy caido en Kubernetes ", conversation_id=f"c{idx}")
+            for idx in range(4)
+        ]
+        deadline = time.monotonic() + 5
+        while service.coalescer.stats.coalesced + service.coalescer.stats.executions < 4:
+            assert time.monotonic() < deadline, "requests never reached the coalescer"
+            time.sleep(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert service.coalescer.stats.snapshot() == {"executions": 1, "coalesced": 3}
+    assert sorted(r.conversation_id for r in results) == ["c0", "c1", "c2", "c3"]
+    assert sum(1 for r in results if r.debug.get("coalesced")) == 3
+    assert all(service.memory.get_history(f"c{idx}") == ["Deploy caido en Kubernetes"] for idx in range(4))
+
+
+def test_multi_agent_service_async_coalescing() -> None:
+    calls = []
+
+    async def slow_pipeline(payload: dict) -> RoutedResponse:
+        calls.append(payload["conversation_id"])
+        await asyncio.sleep(0.05)
+        return _echo_response(payload)
+
+    service = MultiAgentService(
+        pipeline=RunnableLambda(_echo_response, afunc=slow_pipeline),
+        memory=InMemoryConversationStore(max_history_turns=3),
+    )
+
+    async def run() -> list[RoutedResponse]:
+        return await asyncio.gather(
+            service.aask("deploy en kubernetes", conversation_id="a"),
+            service.aask("Deploy  en Kubernetes", conversation_id="b"),
+            service.aask("otra consulta", conversation_id="c"),
+        )
+
+    results = asyncio.run(run())
+    assert len(calls) == 2
+    assert [r.conversation_id for r in results] == ["a", "b", "c"]
+    assert service.coalescer.stats.coalesced == 1
+
+
+def test_multi_agent_service_async_leader_cancellation_does_not_fail_followers() -> None:
+    async def slow_pipeline(payload: dict) -> RoutedResponse:
+        await asyncio.sleep(0.2)
+        return _echo_response(payload)
+
+    service = MultiAgentService(
+        pipeline=RunnableLambda(_echo_response, afunc=slow_pipeline),
+        memory=InMemoryConversationStore(max_history_turns=3),
+    )
+
+    async def run() -> tuple[BaseException | None, RoutedResponse]:
+        impatient = asyncio.ensure_future(
+            asyncio.wait_for(service.aask("deploy en kubernetes", conversation_id="leader"), 0.05)
+        )
+        await asyncio.sleep(0.01)
+        follower = await service.aask("deploy en kubernetes", conversation_id="follower")
+        try:
+            await impatient
+        except BaseException as exc:  # noqa: BLE001 - the leader is expected to time out
+            return exc, follower
+        return None, follower
+
+    leader_error, follower = asyncio.run(run())
+    assert isinstance(leader_error, asyncio.TimeoutError)
+    assert follower.conversation_id == "follower"
+    assert follower.debug["coalesced"] is True
+
+
+
+def test_multi_agent_service_accounts_tokens_per_stage_and_route(tmp_path) -> None:
+    accountant = TokenAccountant(export_path=tmp_path / "usage.json", export_interval_s=0.0)
+    usage = {"input_tokens": 40, "output_tokens": 10, "total_tokens": 50}
+    fake_llm = GenericFakeChatModel(
+        messages=iter([AIMessage(content="x", usage_metadata=usage) for _ in range(4)])
+    )
+    classifier_llm = fake_llm.with_config(callbacks=[accountant.callback("intent_classifier")])
+    agent_llm = fake_llm.with_config(callbacks=[accountant.callback("tech_rag_agent")])
+
+    def pipeline(payload: dict) -> RoutedResponse:
+        classifier_llm.invoke(payload["query"])
+        agent_llm.invoke(payload["query"])
+        return _echo_response(payload)
+
+    service = MultiAgentService(
+        pipeline=RunnableLambda(pipeline),
+        memory=InMemoryConversationStore(),
+        accountant=accountant,
+    )
+    result = service.ask("deploy en kubernetes", conversation_id="t1")
+    service.ask("rollback de deploy", conversation_id="t1")
+
+    stages = result.debug["token_usage"]["stages"]
+    assert stages["intent_classifier"]["total_tokens"] == 50
+    assert stages["tech_rag_agent"]["prompt_tokens"] == 40
+    assert result.debug["token_usage"]["total"]["llm_calls"] == 2
+    assert accountant.snapshot()["tech_rag_agent"] == {
+        "prompt_tokens": 160,
+        "completion_tokens": 40,
+        "total_tokens": 200,
+        "llm_calls": 4,
+        "requests": 2,
+    }
+    exported = json.loads((tmp_path / "usage.json").read_text(encoding="utf-8"))
+    assert exported["routes"]["tech_rag_agent"]["requests"] == 2
+
+
+def test_memory_store_compacts_turns_and_keeps_rolling_digest() -> None:
+    store = InMemoryConversationStore(max_history_turns=2, max_turn_tokens=4)
+    store.append_user_turn("c1", "politica de vacaciones")
+    store.append_user_turn("c1", "Politica de vacaciones")
+    assert store.get_history("c1") == ["Politica de vacaciones"]
+
+    store.append_user_turn("c1", "deploy en kubernetes con rollback y canary")
+    store.append_user_turn("c1", "debug de la api")
+    assert store.get_history("c1") == ["deploy en kubernetes con ...", "debug de la api"]
+
+    digest = store.get_digest("c1")
+    assert digest.startswith("turns=4; HR=2; TECH=4")
+    assert "vacaciones x2" in digest
+    store.clear("c1")
+    assert store.get_digest("c1") == ""
+
+
+def test_memory_digest_counts_keywords_past_truncated_tokens() -> None:
+    store = InMemoryConversationStore(max_turn_tokens=3)
+    store.append_user_turn("c1", "hola mi api de kubernetes falla")
+    assert store.get_history("c1") == ["hola mi api ..."]
+    assert "TECH=2" in store.get_digest("c1")
+
+
+def test_classifier_prompt_size_does_not_grow_with_history_window() -> None:
+    prompt_sizes = []
+    for max_history_turns in (4, 40):
+        store = InMemoryConversationStore(max_history_turns=max_history_turns)
+        for turn in range(40):
+            store.append_user_turn("c1", f"turno {turn:02d} sobre deploy en kubernetes y vacaciones")
+        llm = ToolCallingFakeChatModel(
+            tool_args={"intent": "TECH", "confidence": 0.9, "rationale": "tech"}, prompts=[]
+        )
+        result = build_intent_classifier(llm).invoke(
+            {
+                "query": "y el rollback?",
+                "history": store.get_history("c1"),
+                "history_digest": store.get_digest("c1"),
+            }
+        )
+        assert result.intent == IntentLabel.TECH
+        assert len(store.get_history("c1")) == max_history_turns
+        assert "turno 39" in llm.prompts[0]
+        assert "turno 37" not in llm.prompts[0]
+        prompt_sizes.append(len(llm.prompts[0]))
+
+    assert prompt_sizes[0] == prompt_sizes[1]
+
+
+
+def _fused_answer(intent: IntentLabel, confidence: float) -> FusedRAGAnswer:
+    return FusedRAGAnswer(
+        intent=intent,
+        confidence=confidence,
+        rationale="fused",
+        answer="fused answer",
+        citations=["runbook_tech.md#chunk-2"],
+        follow_up_question="?",
+        retrieval_hits=3,
+    )
+
+
+def test_orchestrator_fused_mode_answers_in_single_call() -> None:
+    calls = []
+    classifier = RunnableLambda(lambda x: calls.append("classifier") or heuristic_intent_router(x["query"]))
+    tech_agent = RunnableLambda(lambda x: calls.append("tech") or {"answer": "two-step", "citations": [], "confidence": 0.9, "follow_up_question": "?"})
+    fused_agent = RunnableLambda(lambda x: calls.append("fused") or _fused_answer(IntentLabel.TECH, 0.92))
+
+    orchestrator = build_orchestrator(
+        DummyLLM(), tech_agent, tech_agent, classifier=classifier, fused_agent=fused_agent
+    )
+    result = orchestrator.invoke({"query": "deploy en kubernetes"})
+
+    assert calls == ["fused"]
+    assert result.route_used == "tech_rag_agent"
+    assert result.answer == "fused answer"
+    assert result.retrieval_hits == 3
+    assert result.debug["mode"] == "fused"
+    assert result.debug["fused_threshold"] == 0.80
+
+
+def test_orchestrator_fused_mode_falls_back_on_low_confidence() -> None:
+    classifier = RunnableLambda(lambda x: heuristic_intent_router(x["query"]))
+    tech_agent = RunnableLambda(lambda x: {"answer": "two-step", "citations": [], "confidence": 0.9, "follow_up_question": "?"})
+    fused_agent = RunnableLambda(lambda x: _fused_answer(IntentLabel.TECH, 0.70))
+
+    orchestrator = build_orchestrator(
+        DummyLLM(),
+        tech_agent,
+        tech_agent,
+        classifier=classifier,
+        intent_min_confidence=0.60,
+        fused_agent=fused_agent,
+        fused_min_confidence=0.80,
+    )
+    result = orchestrator.invoke({"query": "deploy en kubernetes"})
+
+    assert result.answer == "two-step"
+    assert result.route_used == "tech_rag_agent"
+    assert result.debug["mode"] == "fused_fallback"
+    assert result.debug["fused_confidence"] == 0.70
+    assert result.debug["fused_threshold"] == 0.80
+    assert result.debug["threshold_used"] == 0.60
+
+
+def test_fused_rag_agent_retrieves_domains_in_parallel_and_merges_seed_citations() -> None:
+    data = Path(__file__).resolve().parents[1] / "data"
+    hr = SimpleKeywordRetriever(docs=load_domain_docs([data / "hr" / "manual_rrhh.md"]), k=2)
+    tech = SimpleKeywordRetriever(docs=load_domain_docs([data / "tech" / "runbook_tech.md"]), k=2)
+    # Both retrievals must be in flight at once to pass the barrier.
+    both_running = threading.Barrier(2)
+
+    def after_barrier(retriever: SimpleKeywordRetriever) -> RunnableLambda:
+        def retrieve(query: str) -> list:
+            both_running.wait(timeout=5)
+            return retriever.invoke(query)
+
+        return RunnableLambda(retrieve)
+
+    seeds = [f"{d.metadata['source']}#chunk-{d.metadata['chunk_id']}" for d in tech.invoke("deploy en kubernetes")]
+    llm = ToolCallingFakeChatModel(
+        tool_args={
+            "intent": "TECH",
+            "confidence": 1.0,
+            "rationale": "  deploy question  ",
+            "answer": "usar rollback",
+            "citations": [seeds[0], "manual_rrhh.md#chunk-99"],
+            "follow_up_question": "?",
+            "retrieval_hits": 0,
+        },
+        prompts=[],
+    )
+    fused = build_fused_rag_agent(
+        llm, {IntentLabel.HR: after_barrier(hr), IntentLabel.TECH: after_barrier(tech)}
+    )
+
+    result = fused.invoke({"query": "deploy en kubernetes", "history": [], "history_digest": ""})
+
+    assert result.confidence == 1.0
+    assert result.rationale == "deploy question"
+    assert result.citations == [seeds[0], "manual_rrhh.md#chunk-99", *seeds[1:]]
+    assert result.retrieval_hits == len(seeds)
+    assert result.evidence_notes == [f"{len(seeds)} context chunks retrieved for TECH (fused call)"]
+    assert "### HR" in llm.prompts[0] and "### TECH" in llm.prompts[0]
+
+
+
+def test_token_export_failure_does_not_fail_request(tmp_path) -> None:
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("file, not a directory", encoding="utf-8")
+    accountant = TokenAccountant(export_path=blocker / "usage.json", export_interval_s=0.0)
+    service = MultiAgentService(
+        pipeline=RunnableLambda(_echo_response),
+        memory=InMemoryConversationStore(),
+        accountant=accountant,
+    )
+
+    result = service.ask("deploy en kubernetes", conversation_id="t1")
+
+    assert result.route_used == "tech_rag_agent"
+    assert service.memory.get_history("t1") == ["deploy en kubernetes"]
+    assert accountant.snapshot()["tech_rag_agent"]["requests"] == 1
+
+
+
+def test_orchestrator_fused_mode_confident_unknown_skips_two_step_path() -> None:
+    calls = []
+    classifier = RunnableLambda(lambda x: calls.append("classifier") or heuristic_intent_router(x["query"]))
+    agent = RunnableLambda(lambda x: calls.append("agent") or {"answer": "two-step", "citations": [], "confidence": 0.9, "follow_up_question": "?"})
+    fused_agent = RunnableLambda(lambda x: calls.append("fused") or _fused_answer(IntentLabel.UNKNOWN, 0.95))
+
+    orchestrator = build_orchestrator(DummyLLM(), agent, agent, classifier=classifier, fused_agent=fused_agent)
+    result = orchestrator.invoke({"query": "quiero pedir un cafe"})
+
+    assert calls == ["fused"]
+    assert result.route_used == "fallback_unknown"
+    assert result.intent == IntentLabel.UNKNOWN
+    assert result.debug["mode"] == "fused"
+
+
+def test_async_token_export_runs_off_event_loop(tmp_path) -> None:
+    accountant = TokenAccountant(export_path=tmp_path / "usage.json", export_interval_s=0.0)
+    writer_threads = []
+    original_export = accountant.export
+
+    def export() -> None:
+        writer_threads.append(threading.current_thread())
+        original_export()
+
+    accountant.export = export
+    service = MultiAgentService(
+        pipeline=RunnableLambda(_echo_response),
+        memory=InMemoryConversationStore(),
+        accountant=accountant,
+    )
+
+    asyncio.run(service.aask("deploy en kubernetes", conversation_id="t1"))
+
+    assert writer_threads and writer_threads[0] is not threading.main_thread()
+    exported = json.loads((tmp_path / "usage.json").read_text(encoding="utf-8"))
+    assert exported["routes"]["tech_rag_agent"]["requests"] == 1
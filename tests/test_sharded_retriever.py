@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from multi_agent_system.retrievers import SimpleKeywordRetriever, load_domain_docs
+from multi_agent_system.sharded_retriever import ShardedKeywordRetriever, partition
+
+
+def _domain_docs() -> list[Document]:
+    data = Path(__file__).resolve().parents[1] / "data"
+    return load_domain_docs([data / "hr" / "manual_rrhh.md", data / "tech" / "runbook_tech.md"])
+
+
+def test_partition_balances_contiguous_ranges() -> None:
+    assert [len(r) for r in partition(10, 3)] == [4, 3, 3]
+    assert partition(1, 4) == [range(0, 1)]
+
+
+def test_sharded_retriever_matches_single_process_ranking() -> None:
+    docs = _domain_docs()
+    baseline = SimpleKeywordRetriever(docs=docs, k=4)
+
+    with ShardedKeywordRetriever(docs=docs, k=4, shards=2) as sharded:
+        assert not sharded.started
+        assert sharded.start() is sharded
+        assert sharded.started
+        for query in ["politica de vacaciones", "deploy kubernetes rollback", "nada relevante"]:
+            expected = baseline.invoke(query)
+            got = sharded.invoke(query)
+            assert [d.metadata for d in got] == [d.metadata for d in expected]
+
+    assert not sharded.started
+
+
+def test_sharded_retriever_concurrent_first_queries_start_each_shard_once() -> None:
+    docs = _domain_docs()
+    expected = [d.metadata for d in SimpleKeywordRetriever(docs=docs, k=4).invoke("politica de vacaciones")]
+    workers_before = len(multiprocessing.active_children())
+    start = threading.Barrier(8)
+
+    with ShardedKeywordRetriever(docs=docs, k=4, shards=2) as sharded:
+
+        def query(_: int) -> list[dict]:
+            start.wait(timeout=5)
+            return [d.metadata for d in sharded.invoke("politica de vacaciones")]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(query, range(8)))
+        assert sharded.started
+        assert len(multiprocessing.active_children()) - workers_before == 2
+
+    assert all(result == expected for result in results)
+    assert not sharded.started
+    assert len(multiprocessing.active_children()) == workers_before